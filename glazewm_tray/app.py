@@ -4,14 +4,25 @@ import os
 import sys
 import json
 import time
+import queue
+import select
 import threading
 import subprocess
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import NamedTuple
 
 import pystray
 from pystray import MenuItem as item
 from PIL import Image, ImageDraw, ImageFont
 import websocket
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # optional speedup — stdlib json works the same
+    _loads = json.loads
+
 import config
 from . import settings as _settings
 from .floating_bar import FloatingBar
@@ -19,205 +30,475 @@ from .icons import get_process_icon
 from .win32 import make_process_windows_unfocusable
 
 
+# Event handler results, OR-ed together over a burst of frames
+_REFRESH_QUERY = 1  # re-query GlazeWM before redrawing
+_REFRESH_NOW = 2    # skip the debounce delay
+
+
+def _recv_payload(ws):
+    """Receive one message as raw bytes (b'' on close).
+
+    Both JSON parsers accept bytes, so skipping recv()'s str decode saves
+    a full copy of every frame.
+    """
+    opcode, data = ws.recv_data()
+    if opcode == websocket.ABNF.OPCODE_CLOSE:
+        return b''
+    return data
+
+
+def _close_quietly(ws):
+    """Close a WebSocket, ignoring errors from an already broken connection."""
+    try:
+        ws.close()
+    except (OSError, websocket.WebSocketException):
+        pass
+
+
+def _frame_waiting(ws):
+    """True if more data is already buffered on the socket (non-blocking)."""
+    return bool(select.select([ws.sock], [], [], 0)[0])
+
+
+# Built once; the subscription list is fixed for the process lifetime
+_SUB_MSG = "sub -e " + " ".join(config.SUBSCRIBE_EVENTS)
+
+
+def _noop():
+    """Action for disabled, label-only menu items."""
+
+
+_EVENT_TYPE_TAG = b'"eventType":"'
+
+
+def _peek_event_type(raw):
+    """Read eventType straight from a frame's bytes, or None if not found.
+
+    Key order doesn't matter. A quote inside a JSON string value is always
+    escaped, so the unescaped '"eventType":"' sequence can only be a key,
+    and GlazeWM event payloads carry that key once.
+    """
+    start = raw.find(_EVENT_TYPE_TAG)
+    if start < 0:
+        return None
+    start += len(_EVENT_TYPE_TAG)
+    end = raw.find(b'"', start)
+    if end < 0:
+        return None
+    return raw[start:end].decode()
+
+
+def _workspace_sort_key(name):
+    """Numeric names sort naturally ("2" < "10"), others after them.
+
+    isdecimal, not isdigit: names like '²' are digits but not int()-able.
+    """
+    return (int(name) if name.isdecimal() else 1 << 31, name)
+
+
+class Window(NamedTuple):
+    title: str
+    process: str
+
+
+class Workspace(NamedTuple):
+    """A workspace as shown in the tray and bar.
+
+    sort_key comes first so a list of workspaces sorts with plain
+    tuple comparison.
+    """
+    sort_key: tuple
+    name: str
+    focused: bool
+    resident: bool
+    windows: tuple
+
+
+class TrayState(NamedTuple):
+    """Everything the tray and bar display, published as one snapshot.
+
+    Readers take `app.state` once and use its fields, so they never mix
+    values from two different updates.
+    """
+    workspaces: tuple       # sorted Workspace tuples
+    by_name: dict           # the same workspaces keyed by name; never mutated
+    current_ws: str
+    window_count: int
+    error_count: int
+    last_error: object      # str or None
+
+
 class GlazeTrayApp:
+    # Distinct tray icon states kept rendered (FIFO eviction)
+    _ICON_CACHE_SIZE = 16
+    # Idle query/command WebSocket connections kept open
+    _WS_POOL_SIZE = 4
+    # Seconds between pings on idle connections
+    _KEEPALIVE_INTERVAL = 20
+    # Events whose handlers read the payload; others are routed on eventType
+    _PAYLOAD_EVENTS = frozenset({'focus_changed'})
+
     def __init__(self):
         self.running = True
-        self.current_ws = "?"
-        self.all_workspaces = []
+        # Replaced wholesale, never mutated; writers serialize on _state_lock
+        self.state = TrayState((), {}, "?", 0, 0, None)
+        self._state_lock = threading.Lock()
         self.icon = None
         self.bar = None  # FloatingBar instance
-        self.last_error = None
-        self.error_count = 0
-        self._lock = threading.Lock()
-        self.window_count = 0
 
         # WebSocket connections
         self._ws_sub = None
-        self._ws_cmd = None
-        self._cmd_lock = threading.Lock()
+        # Idle query/command connections; each call borrows one, so a menu
+        # click never waits behind an in-flight state query.
+        self._ws_pool = queue.Queue(maxsize=self._WS_POOL_SIZE)
 
         # Debounced refresh: query only after events settle
-        self._last_event_time = 0
-        self._dirty = False
-        self._immediate = False
-        self._event = threading.Event()
-
-        # Cached font (loaded once)
+        self._settle_deadline = 0  # time.monotonic() when events go quiet
+        self._dirty_ev = threading.Event()      # a refresh is pending
+        self._immediate_ev = threading.Event()  # ...and should skip the debounce
+        self._query_ev = threading.Event()      # ...and needs a fresh query
+        # Workspace focused per the last event, not yet applied; a deque so
+        # the event thread's append and the worker's pop are each atomic
+        self._pending_focus = deque(maxlen=1)
+
+        # Event dispatch: eventType -> handler(event_data); anything not
+        # listed here is debounced.
+        self._event_handlers = dict.fromkeys(config.IMMEDIATE_EVENTS, self._on_immediate_event)
+        self._event_handlers['window_managed'] = self._on_window_managed
+        self._event_handlers['focus_changed'] = self._on_focus_changed
+
+        # Cached font (loaded once) and rendered tray icons
         self._font = self._load_font()
-
-        # State cache to skip redundant redraws
+        self._icon_cache = OrderedDict()
+        self._icon_bg = Image.new('RGB', (64, 64), config.COLORS["bg"])
+        self._glyph_masks = {}
+        for ch in "123456789?!":
+            self._glyph_mask(ch)
+
+        # State caches to skip redundant parsing and redraws
+        self._last_raw = None
         self._last_state = None
 
+        # Menu cache: rebuilt only when its signature changes
+        self._last_menu_sig = None
+        self._last_menu = None
+        self._focus_handlers = {}
+        self._focus_checks = {}
+        self._menu_focus = None  # current_ws the tray menu's checks show
+
+        # Commands from menus and event handlers run on one worker thread,
+        # in order, so neither the UI nor the event stream waits on the ack.
+        self._cmd_queue = queue.Queue()
+        threading.Thread(target=self._cmd_worker, daemon=True).start()
+        self._menu_controls = None  # built lazily by _control_items
+        self._exit_items = (
+            item("Restart", self.restart),
+            item("Exit Tray Tool", self.on_exit),
+        )
+
     @staticmethod
     def _load_font():
+        # Glyphs are drawn one character at a time, so there's nothing for
+        # a text shaper (raqm) to do — use the basic layout engine
+        # (ImageFont.Layout needs Pillow >= 9.1; older versions use the default).
+        layout = getattr(ImageFont, 'Layout', None)
+        layout_engine = layout.BASIC if layout else None
+        for name in ("arialbd.ttf", "arial.ttf"):
+            try:
+                return ImageFont.truetype(name, 32, layout_engine=layout_engine)
+            except OSError:
+                pass
+        try:
+            # Pillow >= 10.1 bundles a scalable font — same size everywhere
+            return ImageFont.load_default(size=32)
+        except TypeError:
+            return ImageFont.load_default()
+
+    def _borrow_cmd_ws(self):
+        """Take an idle query/command connection from the pool or open one."""
+        while True:
+            try:
+                ws = self._ws_pool.get_nowait()
+            except queue.Empty:
+                break
+            if ws.connected:
+                return ws
+        ws = websocket.WebSocket()
+        ws.connect(config.GLAZEWM_WS_URL, timeout=2)
+        return ws
+
+    def _return_cmd_ws(self, ws):
+        try:
+            self._ws_pool.put_nowait(ws)
+        except queue.Full:
+            _close_quietly(ws)
+
+    def _ws_query_raw(self, message, unchanged=None):
+        """Send a query/command over WebSocket; return (raw bytes, response).
+
+        The response is not parsed (None) when the bytes equal `unchanged`.
+        A connection that answers with a close frame or unparsable data is
+        closed instead of going back to the pool.
+        """
+        ws = self._borrow_cmd_ws()
         try:
-            return ImageFont.truetype("arialbd.ttf", 32)
+            ws.send(message)
+            raw = _recv_payload(ws)
+            if not raw:
+                raise websocket.WebSocketConnectionClosedException(
+                    "GlazeWM closed the connection")
+            response = None if raw == unchanged else _loads(raw)
         except Exception:
+            _close_quietly(ws)
+            raise
+        self._return_cmd_ws(ws)
+        return raw, response
+
+    def _close_sockets(self):
+        """Close the event stream and all pooled query/command connections."""
+        sockets = [self._ws_sub]
+        while True:
             try:
-                return ImageFont.truetype("arial.ttf", 32)
-            except Exception:
-                return ImageFont.load_default()
+                sockets.append(self._ws_pool.get_nowait())
+            except queue.Empty:
+                break
+        for ws in sockets:
+            if ws:
+                _close_quietly(ws)
 
-    def _get_cmd_ws(self):
-        """Get or create the query/command WebSocket connection."""
-        if self._ws_cmd is None or not self._ws_cmd.connected:
-            try:
-                self._ws_cmd = websocket.WebSocket()
-                self._ws_cmd.connect(config.GLAZEWM_WS_URL, timeout=2)
-            except Exception:
-                self._ws_cmd = None
-                raise
-        return self._ws_cmd
+    def _keepalive_loop(self):
+        """Ping idle connections so a dead socket is dropped before it's needed."""
+        while self.running:
+            time.sleep(self._KEEPALIVE_INTERVAL)
+            idle = []
+            while True:
+                try:
+                    idle.append(self._ws_pool.get_nowait())
+                except queue.Empty:
+                    break
+            for ws in idle:
+                try:
+                    ws.ping()
+                except (OSError, websocket.WebSocketException):
+                    _close_quietly(ws)
+                else:
+                    self._return_cmd_ws(ws)
 
     def _ws_query(self, message):
         """Send a query/command over WebSocket and return the parsed response."""
-        with self._cmd_lock:
-            ws = self._get_cmd_ws()
-            ws.send(message)
-            raw = ws.recv()
-            return json.loads(raw)
+        return self._ws_query_raw(message)[1]
 
     def query_glaze(self):
         """Query GlazeWM state via WebSocket."""
+        # The response supersedes focus events seen so far; later ones stay
+        # pending and are applied on top of it.
+        self._pending_focus.clear()
         try:
-            response = self._ws_query("query monitors")
+            # Byte-identical response and no error to clear: state is current
+            raw, response = self._ws_query_raw(
+                "query monitors", self._last_raw if self.state.error_count == 0 else None)
+            if response is None:
+                return
 
             if not response.get('success'):
-                self.error_count += 1
-                self.last_error = response.get('error', 'Query failed')
+                self._record_error(response.get('error', 'Query failed'))
                 return
 
             data = response.get('data', {})
             new_ws_list = []
             total_windows = 0
 
-            def collect_windows(node):
-                """Recursively collect window titles from a container tree."""
+            def collect_windows(children):
+                """Collect window titles from a container tree (iterative DFS).
+
+                Only split containers' `children` are descended into — rects,
+                focus order lists etc. are never walked. Every node is a
+                container dict; a malformed tree fails the whole query.
+                """
                 wins = []
-                if isinstance(node, dict):
-                    if node.get('type') == 'window':
-                        wins.append({
-                            "title": node.get('title', ''),
-                            "process": node.get('processName', '')
-                        })
-                        return wins
-                    for v in node.values():
-                        if isinstance(v, (dict, list)):
-                            wins.extend(collect_windows(v))
-                elif isinstance(node, list):
-                    for el in node:
-                        if isinstance(el, (dict, list)):
-                            wins.extend(collect_windows(el))
+                stack = children[::-1]
+                # Bound once: this loop runs for every container on a query
+                pop, push, add = stack.pop, stack.extend, wins.append
+                while stack:
+                    get = pop().get
+                    node_type = get('type')
+                    if node_type == 'window':
+                        add(Window(get('title') or '', get('processName') or ''))
+                    elif node_type == 'split':
+                        # Reversed so windows pop in on-screen order
+                        push(get('children', ())[::-1])
                 return wins
 
-            stack = [data]
-            while stack:
-                obj = stack.pop()
-                if isinstance(obj, dict):
-                    obj_type = obj.get('type')
-                    if obj_type == 'workspace':
-                        windows = collect_windows(obj.get('children', []))
-                        total_windows += len(windows)
-                        new_ws_list.append({
-                            "name": str(obj.get('name')),
-                            "focused": obj.get('hasFocus', False),
-                            "resident": len(windows) > 0,
-                            "windows": windows
-                        })
-                    else:
-                        for v in obj.values():
-                            if isinstance(v, (dict, list)):
-                                stack.append(v)
-                elif isinstance(obj, list):
-                    for el in obj:
-                        if isinstance(el, (dict, list)):
-                            stack.append(el)
-
-            with self._lock:
-                self.all_workspaces = sorted(new_ws_list, key=lambda x: x['name'])
-
-                for ws in self.all_workspaces:
-                    if ws['focused']:
-                        self.current_ws = ws['name']
-                        break
+            # Fixed shape: monitors -> workspaces -> (split containers|windows)
+            for monitor in data.get('monitors', ()):
+                for ws in monitor.get('children', ()):
+                    if ws.get('type') != 'workspace':
+                        continue
+                    windows = collect_windows(ws.get('children', []))
+                    total_windows += len(windows)
+                    name = str(ws.get('name'))
+                    new_ws_list.append(Workspace(
+                        sort_key=_workspace_sort_key(name),
+                        name=name,
+                        focused=ws.get('hasFocus', False),
+                        resident=len(windows) > 0,
+                        windows=tuple(windows),
+                    ))
 
-                self.window_count = total_windows
+            new_ws_list.sort()
 
-                if self.error_count > 0:
-                    print("GlazeWM connection restored")
-                self.error_count = 0
-                self.last_error = None
+            old = self._publish_workspaces(new_ws_list, window_count=total_windows,
+                                           error_count=0, last_error=None)
+            if old.error_count > 0:
+                print("GlazeWM connection restored")
+            self._last_raw = raw
 
         except Exception as e:
-            self.error_count += 1
-            self.last_error = str(e)
-            if self._ws_cmd:
-                try:
-                    self._ws_cmd.close()
-                except:
-                    pass
-                self._ws_cmd = None
-            if self.error_count % 10 == 1:
+            if self._record_error(str(e)) % 10 == 1:
                 print(f"Query Error: {e}")
 
-    def create_icon_image(self):
-        """Draws a compact indicator of all active workspaces."""
-        width, height = 64, 64
-        img = Image.new('RGB', (width, height), config.COLORS["bg"])
-        d = ImageDraw.Draw(img)
-
-        font = self._font
-
-        with self._lock:
-            active_ws = [ws for ws in self.all_workspaces if ws['resident'] or ws['focused']]
+    def _publish_workspaces(self, ws_list, **changes):
+        """Publish a new, already sorted workspace list (plus other state
+        `changes`) as one snapshot; returns the snapshot it replaced."""
+        # Readers grab the state reference without locking — a single
+        # attribute rebind is atomic under the GIL and the tuple is never
+        # mutated afterwards.
+        workspaces = tuple(ws_list)
+        by_name = {ws.name: ws for ws in workspaces}
+        focused = next((ws.name for ws in workspaces if ws.focused), None)
+        with self._state_lock:
+            old = self.state
+            self.state = old._replace(workspaces=workspaces, by_name=by_name,
+                                      current_ws=focused or old.current_ws, **changes)
+        return old
+
+    def _record_error(self, message):
+        """Count one more error in the published state; returns the new count."""
+        with self._state_lock:
+            old = self.state
+            self.state = old._replace(error_count=old.error_count + 1, last_error=message)
+        return old.error_count + 1
+
+    def _apply_focus(self, name):
+        """Move the focus flag to workspace `name` without querying GlazeWM."""
+        state = self.state
+        if name not in state.by_name or name == state.current_ws:
+            return
+        self._publish_workspaces([ws._replace(focused=ws.name == name)
+                                  for ws in state.workspaces])
+        # The snapshot no longer matches the last response, so don't let
+        # an identical next response be skipped.
+        self._last_raw = None
+
+    def create_icon_image(self, state=None):
+        """Draws a compact indicator of all active workspaces.
+
+        Rendered images are cached by what they show, so repeated states
+        (e.g. flipping focus back and forth) reuse the same image.
+        """
+        if state is None:
+            state = self.state
+        errored = state.error_count > 3
+        # Only the first three active workspaces fit; stop looking after that
+        active_ws = list(islice(
+            (ws for ws in state.workspaces if ws.resident or ws.focused), 3))
+
+        key = (
+            tuple((ws.name[:1], ws.focused, ws.resident) for ws in active_ws),
+            errored,
+        )
+        img = self._icon_cache.get(key)
+        if img is not None:
+            return img
+
+        img = self._icon_bg.copy()
 
         if not active_ws:
-            if self.error_count > 3:
-                d.text((20, 15), "!", fill=config.COLORS["error"], font=font)
+            if errored:
+                img.paste(config.COLORS["error"], (20, 3), self._glyph_mask("!"))
             else:
-                d.text((20, 15), "?", fill=config.COLORS["text"], font=font)
+                img.paste(config.COLORS["text"], (20, 3), self._glyph_mask("?"))
         else:
             x_offset = 6
-            for ws in active_ws[:3]:
-                color = config.COLORS["text"] if ws['resident'] else config.COLORS["inactive"]
-                d.text((x_offset, 12), ws['name'][:1], fill=color, font=font)
+            for ws in active_ws:
+                color = config.COLORS["text"] if ws.resident else config.COLORS["inactive"]
+                img.paste(color, (x_offset, 0), self._glyph_mask(ws.name[:1]))
 
-                if ws['focused']:
-                    d.rectangle([x_offset, 50, x_offset + 18, 56], fill=config.COLORS["active"])
+                if ws.focused:
+                    img.paste(config.COLORS["active"], (x_offset, 50, x_offset + 19, 57))
 
                 x_offset += 20
 
+        self._icon_cache[key] = img
+        if len(self._icon_cache) > self._ICON_CACHE_SIZE:
+            self._icon_cache.popitem(last=False)  # evict oldest
         return img
 
+    def _glyph_mask(self, ch):
+        """Return `ch` rasterized once into an 'L' mask tile (text at y=12).
+
+        Icons are composed by pasting colors through these masks, so no
+        text is rendered at runtime for already-seen characters.
+        """
+        mask = self._glyph_masks.get(ch)
+        if mask is None:
+            mask = Image.new('L', (40, 64), 0)
+            ImageDraw.Draw(mask).text((0, 12), ch, fill=255, font=self._font)
+            self._glyph_masks[ch] = mask
+        return mask
+
     def run_cmd(self, cmd):
         """Execute GlazeWM command via WebSocket."""
         try:
             self._ws_query(f"command {cmd}")
-            self._dirty = True
-            self._immediate = True
-            self._event.set()
+            self._request_refresh(immediate=True)
         except Exception as e:
             print(f"Command error: {e}")
 
+    def run_cmd_async(self, cmd):
+        """Queue a GlazeWM command for the command worker."""
+        self._cmd_queue.put(lambda: self.run_cmd(cmd))
+
+    def submit(self, job):
+        """Queue an arbitrary callable for the command worker."""
+        self._cmd_queue.put(job)
+
+    def _cmd_worker(self):
+        """Run queued commands in order, off the UI and event threads."""
+        while True:
+            job = self._cmd_queue.get()
+            try:
+                job()
+            except Exception as e:
+                print(f"Command error: {e}")
+
     def toggle_tiling_direction(self):
         """Toggle tiling direction (equivalent to Alt+V)."""
         print("Auto-toggling tiling direction...")
-        self.run_cmd("toggle-tiling-direction")
+        self.run_cmd_async("toggle-tiling-direction")
+
+    def _request_refresh(self, immediate=False, query=True):
+        """Wake debounce_loop — the single worker that queries and redraws."""
+        if query:
+            self._query_ev.set()
+        if immediate:
+            self._immediate_ev.set()
+        self._dirty_ev.set()
 
     def _refresh_icon(self):
         """Update tray icon/floating bar only if state has changed."""
+        if not self.icon and (not self.bar or self.bar._bar_hidden):
+            # Nothing is showing; leave _last_state alone so the next
+            # refresh after the bar reappears still sees the change.
+            return
         try:
-            with self._lock:
-                state_key = (
-                    tuple(
-                        (ws['name'], ws['focused'], ws['resident'],
-                         tuple(w.get('title', '') for w in ws.get('windows', [])))
-                        for ws in self.all_workspaces
-                    ),
-                    self.window_count,
-                    self.error_count > 3,
-                    self.last_error,
-                )
+            state = self.state  # one snapshot for the whole redraw
+            state_key = (
+                state.workspaces,
+                state.window_count,
+                state.error_count > 3,
+                state.last_error,
+            )
             if state_key == self._last_state:
                 return
             self._last_state = state_key
@@ -225,11 +506,63 @@ class GlazeTrayApp:
             if self.bar:
                 self.bar.schedule_update()
             if self.icon:
-                self.icon.icon = self.create_icon_image()
-                self.icon.menu = self.generate_menu()
+                img = self.create_icon_image(state)
+                if img is not self.icon.icon:
+                    self.icon.icon = img
+                menu = self.generate_menu(state)
+                if menu is not self.icon.menu:
+                    self.icon.menu = menu
+                elif self._menu_focus != state.current_ws:
+                    # Same items, focus moved: have pystray re-read checks
+                    self.icon.update_menu()
+                self._menu_focus = state.current_ws
         except Exception as e:
             print(f"Icon update error: {e}")
 
+    # Event handlers return _REFRESH_* flags; event_loop wakes the debounce
+    # worker once per burst of frames.
+    def _on_debounced_event(self, event_data):
+        return _REFRESH_QUERY
+
+    def _on_immediate_event(self, event_data):
+        return _REFRESH_QUERY | _REFRESH_NOW
+
+    def _on_window_managed(self, event_data):
+        if config.AUTO_TOGGLE_TILING:
+            print("New window managed, auto-toggling...")
+            self.toggle_tiling_direction()
+        if 'window_managed' in config.IMMEDIATE_EVENTS:
+            return _REFRESH_QUERY | _REFRESH_NOW
+        return _REFRESH_QUERY
+
+    def _on_focus_changed(self, event_data):
+        # Focus landing on a known workspace itself (i.e. an empty one) is
+        # fully described by the payload; anything else needs a query.
+        container = event_data.get('focusedContainer') or {}
+        name = container.get('name')
+        if container.get('type') == 'workspace' and name in self.state.by_name:
+            self._pending_focus.append(name)
+            return _REFRESH_NOW
+        if 'focus_changed' in config.IMMEDIATE_EVENTS:
+            return _REFRESH_QUERY | _REFRESH_NOW
+        return _REFRESH_QUERY
+
+    def _dispatch_event(self, raw):
+        """Run one event frame's handler; returns _REFRESH_* flags.
+
+        The frame is only JSON-parsed when its handler needs the payload.
+        """
+        event_type = _peek_event_type(raw)
+        event_data = None
+        if event_type is None or event_type in self._PAYLOAD_EVENTS:
+            try:
+                event = _loads(raw)
+            except ValueError:
+                return 0
+            event_data = event.get('data', {})
+            event_type = event_data.get('eventType', '')
+        return self._event_handlers.get(event_type, self._on_debounced_event)(event_data)
+
     def event_loop(self):
         """Subscribe to GlazeWM events via WebSocket."""
         while self.running:
@@ -238,198 +571,235 @@ class GlazeTrayApp:
                 self._ws_sub.connect(config.GLAZEWM_WS_URL, timeout=5)
                 self._ws_sub.settimeout(None)
 
-                sub_msg = "sub -e " + " ".join(config.SUBSCRIBE_EVENTS)
-                self._ws_sub.send(sub_msg)
+                self._ws_sub.send(_SUB_MSG)
 
-                ack = json.loads(self._ws_sub.recv())
+                ack = _loads(_recv_payload(self._ws_sub))
                 if not ack.get('success'):
                     raise Exception(f"Subscription failed: {ack.get('error')}")
 
                 print("Connected to GlazeWM event stream (WebSocket)")
 
+                # Resync once per (re)connect — events may have been missed
+                # while the stream was down.
+                self._request_refresh(immediate=True)
+
                 while self.running:
-                    raw = self._ws_sub.recv()
+                    raw = _recv_payload(self._ws_sub)
                     if not raw:
                         break
 
-                    try:
-                        event = json.loads(raw)
-                    except json.JSONDecodeError:
-                        continue
-
-                    event_data = event.get('data', {})
-                    event_type = event_data.get('eventType', '')
-
-                    self._last_event_time = time.time()
-                    self._dirty = True
-                    if event_type in config.IMMEDIATE_EVENTS:
-                        self._immediate = True
-                    self._event.set()
-
-                    if config.AUTO_TOGGLE_TILING and event_type == 'window_managed':
-                        print("New window managed, auto-toggling...")
-                        self.toggle_tiling_direction()
+                    # Handle the whole burst already buffered on the socket,
+                    # then wake the debounce worker once for all of it.
+                    flags = 0
+                    while raw:
+                        flags |= self._dispatch_event(raw)
+                        if not _frame_waiting(self._ws_sub):
+                            break
+                        raw = _recv_payload(self._ws_sub)
+
+                    if flags:
+                        self._settle_deadline = time.monotonic() + config.QUERY_DEBOUNCE
+                        self._request_refresh(bool(flags & _REFRESH_NOW),
+                                              bool(flags & _REFRESH_QUERY))
+                    if not raw:
+                        break
 
                 if self.running:
-                    self.error_count += 1
-                    self.last_error = "Event stream disconnected"
-                    self._refresh_icon()
+                    self._record_error("Event stream disconnected")
+                    # Redraw via the worker: it is the only one that draws
+                    self._request_refresh(immediate=True, query=False)
                     print("GlazeWM event stream disconnected, reconnecting in 2s...")
                     time.sleep(2)
 
             except Exception as e:
                 if self.running:
-                    self.error_count += 1
-                    self.last_error = str(e)
-                    self._refresh_icon()
+                    self._record_error(str(e))
+                    self._request_refresh(immediate=True, query=False)
                     print(f"Event loop error: {e}")
                     time.sleep(2)
             finally:
                 if self._ws_sub:
-                    try:
-                        self._ws_sub.close()
-                    except:
-                        pass
+                    _close_quietly(self._ws_sub)
                     self._ws_sub = None
 
     def debounce_loop(self):
         """Wait for events, then query after they settle."""
         while self.running:
             try:
-                self._event.wait()
-                self._event.clear()
-
-                if not self._dirty:
-                    continue
-
-                if self._immediate:
-                    self._immediate = False
-                    self._dirty = False
-                    self.query_glaze()
-                    self._refresh_icon()
-                    continue
-
-                while self.running and self._dirty:
-                    elapsed = time.time() - self._last_event_time
-                    if elapsed >= config.QUERY_DEBOUNCE:
-                        self._dirty = False
-                        self.query_glaze()
-                        self._refresh_icon()
+                self._dirty_ev.wait()
+                if not self.running:
+                    break
+
+                # Wait until events have settled for QUERY_DEBOUNCE; an
+                # immediate request cuts the wait short.
+                while not self._immediate_ev.is_set():
+                    remaining = self._settle_deadline - time.monotonic()
+                    if remaining <= 0:
                         break
-                    self._event.wait(timeout=config.QUERY_DEBOUNCE - elapsed)
-                    self._event.clear()
+                    self._immediate_ev.wait(timeout=remaining)
+
+                # Clear before querying: anything arriving meanwhile re-arms
+                self._immediate_ev.clear()
+                self._dirty_ev.clear()
+                if self._query_ev.is_set():
+                    self._query_ev.clear()
+                    self.query_glaze()  # fresher than any pending focus
+                elif self._pending_focus:
+                    # Only this thread removes entries, so it can't be empty now
+                    self._apply_focus(self._pending_focus.pop())
+                self._refresh_icon()
             except Exception as e:
                 print(f"Debounce loop error: {e}")
                 time.sleep(1)
 
-    def generate_menu(self):
-        """Generate context menu dynamically."""
-        menu_items = []
-        menu_items.append(item("─── Workspaces ───", lambda: None, enabled=False))
+    def generate_menu(self, state=None):
+        """Generate context menu dynamically.
+
+        The menu is rebuilt only when the workspace/window list, window
+        count or warning changed; otherwise the previous Menu is returned.
+        Focus is not part of that: check marks read current_ws live.
+        """
+        if state is None:
+            state = self.state
+        workspaces = state.workspaces
+        win_count = state.window_count
+        warning = state.last_error if state.last_error and state.error_count > 3 else None
+
+        sig = (
+            tuple((ws.name, ws.resident, ws.windows) for ws in workspaces),
+            win_count,
+            warning,
+        )
+        if sig == self._last_menu_sig:
+            return self._last_menu
 
-        with self._lock:
-            workspaces = list(self.all_workspaces)
-            win_count = self.window_count
+        menu_items = []
+        menu_items.append(item("─── Workspaces ───", _noop, enabled=False))
 
         if not workspaces:
-            menu_items.append(item("  (No workspaces found)", lambda: None, enabled=False))
+            menu_items.append(item("  (No workspaces found)", _noop, enabled=False))
         else:
             for ws in workspaces:
-                name = ws['name']
-                is_focused = ws['focused']
-                has_windows = ws['resident']
-                windows = ws.get('windows', [])
+                name = ws.name
+                has_windows = ws.resident
+                windows = ws.windows
 
                 if has_windows:
                     label = f"● {name}"
                 else:
                     label = f"○ {name}"
 
-                def make_focus_handler(workspace_name):
-                    return lambda: self.run_cmd(f"focus --workspace {workspace_name}")
-
-                def make_check_handler(focused):
-                    return lambda item: focused
-
                 menu_items.append(item(
                     label,
-                    make_focus_handler(name),
-                    checked=make_check_handler(is_focused)
+                    self._focus_handler(name),
+                    checked=self._focus_check(name)
                 ))
 
                 for win in windows:
-                    title = win.get('title', '') or win.get('process', 'Unknown')
+                    title = win.title or win.process or 'Unknown'
                     if len(title) > 40:
                         title = title[:37] + "..."
                     menu_items.append(item(
                         f"    └ {title}",
-                        make_focus_handler(name),
+                        self._focus_handler(name),
                         enabled=True
                     ))
 
         menu_items.append(pystray.Menu.SEPARATOR)
-        menu_items.append(item(f"Total Windows: {win_count}", lambda: None, enabled=False))
-        menu_items.append(pystray.Menu.SEPARATOR)
-        menu_items.append(item("Toggle Floating", lambda: self.run_cmd("toggle-floating")))
-        menu_items.append(item("Toggle Tiling (Alt+V)", lambda: self.run_cmd("toggle-tiling-direction")))
-        menu_items.append(item("Close Window", lambda: self.run_cmd("close")))
-        menu_items.append(pystray.Menu.SEPARATOR)
-
-        def toggle_auto_feature():
-            config.AUTO_TOGGLE_TILING = not config.AUTO_TOGGLE_TILING
-            status = "enabled" if config.AUTO_TOGGLE_TILING else "disabled"
-            print(f"Auto-toggle tiling {status}")
-            self._save_settings()
-
-        menu_items.append(item(
-            "Auto-Toggle on New Window",
-            toggle_auto_feature,
-            checked=lambda item: config.AUTO_TOGGLE_TILING
-        ))
-
-        if config.USE_FLOATING_BAR:
-            menu_items.append(item(
-                "Floating Bar",
-                lambda: self._toggle_floating_bar(),
-                checked=lambda _: self.bar is not None and not self.bar._manually_hidden
-            ))
-            menu_items.append(item(
-                "Dark Background",
-                lambda: self._toggle_bar_background(),
-                checked=lambda _: self.bar is not None and not self.bar._transparent
-            ))
-            menu_items.append(item(
-                "Icons Only",
-                lambda: self._toggle_icons_only(),
-                checked=lambda _: self.bar is not None and self.bar._icons_only
-            ))
-            menu_items.append(item(
-                "Position: Left",
-                lambda: self._toggle_bar_position(),
-                checked=lambda _: self.bar is not None and not self.bar._position_right
-            ))
-            menu_items.append(item(
-                "Label Right of Icons",
-                lambda: self._toggle_label_side(),
-                checked=lambda _: self.bar is not None and not self.bar._label_left
-            ))
-            menu_items.append(item(
-                "Wide Workspace Spacing",
-                lambda: self._toggle_workspace_gap(),
-                checked=lambda _: self.bar is not None and self.bar._workspace_gap > 3
+        menu_items.append(item(f"Total Windows: {win_count}", _noop, enabled=False))
+        menu_items.extend(self._control_items())
+
+        if warning:
+            menu_items.append(item(f"Warning: {warning[:30]}...", _noop, enabled=False))
+
+        menu_items.extend(self._exit_items)
+
+        self._last_menu_sig = sig
+        self._last_menu = pystray.Menu(*menu_items)
+        return self._last_menu
+
+    def _control_items(self):
+        """Static command/toggle entries, built once and reused by every menu.
+
+        Their checked callables read live state, so the items never go stale.
+        """
+        if self._menu_controls is None:
+            items = []
+            items.append(pystray.Menu.SEPARATOR)
+            items.append(item("Toggle Floating", lambda: self.run_cmd_async("toggle-floating")))
+            items.append(item("Toggle Tiling (Alt+V)", lambda: self.run_cmd_async("toggle-tiling-direction")))
+            items.append(item("Close Window", lambda: self.run_cmd_async("close")))
+            items.append(pystray.Menu.SEPARATOR)
+
+            items.append(item(
+                "Auto-Toggle on New Window",
+                self._toggle_auto_feature,
+                checked=lambda item: config.AUTO_TOGGLE_TILING
             ))
 
-        menu_items.append(pystray.Menu.SEPARATOR)
-        menu_items.append(item("Redraw Windows (Alt+Shift+W)", lambda: self.run_cmd("wm-redraw")))
-        menu_items.append(item("Reload GlazeWM", lambda: self.run_cmd("reload-config")))
+            if config.USE_FLOATING_BAR:
+                items.append(item(
+                    "Floating Bar",
+                    lambda: self._toggle_floating_bar(),
+                    checked=lambda _: self.bar is not None and not self.bar._manually_hidden
+                ))
+                items.append(item(
+                    "Dark Background",
+                    lambda: self._toggle_bar_background(),
+                    checked=lambda _: self.bar is not None and not self.bar._transparent
+                ))
+                items.append(item(
+                    "Icons Only",
+                    lambda: self._toggle_icons_only(),
+                    checked=lambda _: self.bar is not None and self.bar._icons_only
+                ))
+                items.append(item(
+                    "Position: Left",
+                    lambda: self._toggle_bar_position(),
+                    checked=lambda _: self.bar is not None and not self.bar._position_right
+                ))
+                items.append(item(
+                    "Label Right of Icons",
+                    lambda: self._toggle_label_side(),
+                    checked=lambda _: self.bar is not None and not self.bar._label_left
+                ))
+                items.append(item(
+                    "Wide Workspace Spacing",
+                    lambda: self._toggle_workspace_gap(),
+                    checked=lambda _: self.bar is not None and self.bar._workspace_gap > 3
+                ))
 
-        if self.last_error and self.error_count > 3:
-            menu_items.append(item(f"Warning: {self.last_error[:30]}...", lambda: None, enabled=False))
+            items.append(pystray.Menu.SEPARATOR)
+            items.append(item("Redraw Windows (Alt+Shift+W)", lambda: self.run_cmd_async("wm-redraw")))
+            items.append(item("Reload GlazeWM", lambda: self.run_cmd_async("reload-config")))
+            self._menu_controls = tuple(items)
+        return self._menu_controls
 
-        menu_items.append(item("Restart", self.restart))
-        menu_items.append(item("Exit Tray Tool", self.on_exit))
+    def _toggle_auto_feature(self):
+        config.AUTO_TOGGLE_TILING = not config.AUTO_TOGGLE_TILING
+        status = "enabled" if config.AUTO_TOGGLE_TILING else "disabled"
+        print(f"Auto-toggle tiling {status}")
+        self._save_settings()
 
-        return pystray.Menu(*menu_items)
+    def _focus_check(self, name):
+        """`checked` callback for workspace `name` — one per name, reused.
+
+        (pystray introspects callbacks' __code__, so functools.partial and
+        other non-function callables can't be used for menu callbacks.)
+        """
+        check = self._focus_checks.get(name)
+        if check is None:
+            check = lambda item: self.state.current_ws == name
+            self._focus_checks[name] = check
+        return check
+
+    def _focus_handler(self, name):
+        """Menu action focusing workspace `name` — one closure per name, reused."""
+        handler = self._focus_handlers.get(name)
+        if handler is None:
+            handler = lambda: self.run_cmd_async(f"focus --workspace {name}")
+            self._focus_handlers[name] = handler
+        return handler
 
     def _toggle_bar_background(self):
         if not self.bar:
@@ -482,10 +852,6 @@ class GlazeTrayApp:
             'workspace_gap': self.bar._workspace_gap if self.bar else 3,
         })
 
-    def _apply_noactivate_delayed(self):
-        time.sleep(1)
-        make_process_windows_unfocusable()
-
     def restart(self, icon=None, item=None):
         """Restart the application by spawning a new process and exiting."""
         script = os.path.abspath(sys.argv[0])
@@ -500,13 +866,8 @@ class GlazeTrayApp:
         """Clean shutdown."""
         print("Shutting down GlazeWM tray...")
         self.running = False
-        self._event.set()
-        for ws in [self._ws_sub, self._ws_cmd]:
-            if ws:
-                try:
-                    ws.close()
-                except:
-                    pass
+        self._dirty_ev.set()
+        self._close_sockets()
         if self.icon:
             try:
                 self.icon.stop()
@@ -532,6 +893,7 @@ class GlazeTrayApp:
 
         threading.Thread(target=self.event_loop, daemon=True).start()
         threading.Thread(target=self.debounce_loop, daemon=True).start()
+        threading.Thread(target=self._keepalive_loop, daemon=True).start()
 
         if config.USE_TRAY_ICON:
             self.icon = pystray.Icon(
@@ -540,19 +902,19 @@ class GlazeTrayApp:
                 "GlazeWM Workspace Manager",
                 self.generate_menu()
             )
+            # pystray's win32 backend creates its hidden window in
+            # Icon.__init__, so it exists by now and can be restyled.
+            make_process_windows_unfocusable()
 
         if config.USE_FLOATING_BAR:
             if self.icon:
-                threading.Thread(target=self._run_tray_icon, daemon=True).start()
+                threading.Thread(target=self.icon.run, daemon=True).start()
             self.bar = FloatingBar(self)
+            # Again once tk has mapped its windows (as the bar's own flags
+            # are), so they get WS_EX_NOACTIVATE too
+            self.bar.root.after(100, make_process_windows_unfocusable)
             self.bar.run()
         elif self.icon:
-            threading.Thread(target=self._apply_noactivate_delayed, daemon=True).start()
             self.icon.run()
         else:
             print("Error: Both USE_FLOATING_BAR and USE_TRAY_ICON are disabled!")
-
-    def _run_tray_icon(self):
-        time.sleep(0.5)
-        make_process_windows_unfocusable()
-        self.icon.run()
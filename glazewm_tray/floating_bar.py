@@ -1,5 +1,7 @@
 """Floating bar widget — a borderless always-on-top tkinter window on the taskbar."""
 
+import re
+import queue
 import threading
 import ctypes
 from ctypes import wintypes
@@ -8,13 +10,25 @@ from PIL import ImageTk
 
 import config
 from . import settings as _settings
-from .icons import get_process_icon, make_fallback_icon
+from .icons import (
+    get_process_icon, cached_process_icon, can_extract_icon, make_fallback_icon,
+)
 from .win32 import (
     WS_EX_NOACTIVATE, WS_EX_TOOLWINDOW, GWL_EXSTYLE,
     is_fullscreen_active, restore_minimized_by_process,
+    hook_foreground_changes, unhook_foreground_changes,
 )
 
 
+# config.COLORS as tkinter hex strings, formatted once
+_COLORS_HEX = {k: '#%02x%02x%02x' % tuple(v[:3]) for k, v in config.COLORS.items()}
+
+# App-name suffixes stripped from window titles on the bar
+_TITLE_SUFFIX_RE = re.compile(
+    r'(?: - (?:Google Chrome|Chrome|Microsoft Edge|Notepad|Visual Studio Code)'
+    r'| — Mozilla Firefox)\Z')
+
+
 class FloatingBar:
     """A borderless always-on-top tkinter window showing workspace info."""
 
@@ -22,6 +36,13 @@ class FloatingBar:
     ICON_SIZE = 16
     PADDING = 6
 
+    # Fullscreen re-check interval; foreground changes are hooked directly
+    _FULLSCREEN_POLL_MS = 5000
+    # Cached Tk images beyond this are pruned to processes still on screen
+    _PHOTO_CACHE_SIZE = 64
+    # Delay before retrying an icon whose extraction failed
+    _ICON_RETRY_MS = 1000
+
     # Color key for transparent mode — a green nobody uses in the UI
     _TRANSPARENT_KEY = '#01fe01'
 
@@ -41,7 +62,7 @@ class FloatingBar:
         self._icons_only = _s['icons_only']
         self._label_left = _s['label_left']
         self._workspace_gap = _s['workspace_gap']
-        self._widget_bg = self._rgb(config.COLORS["bg"])
+        self._widget_bg = _COLORS_HEX["bg"]
         if self._transparent:
             self._bg_hex = self._TRANSPARENT_KEY
             self.bar.configure(bg=self._TRANSPARENT_KEY)
@@ -54,8 +75,22 @@ class FloatingBar:
         self.frame = tk.Frame(self.bar, bg=self._bg_hex)
         self.frame.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
 
-        # Keep references to PhotoImages so they're not garbage collected
-        self._photo_refs = []
+        # Tk images per process, reused across rebuilds; this also keeps
+        # the references that stop them being garbage collected
+        self._photo_cache = {}
+
+        # Icon extraction runs on a worker so rebuilds never wait on GDI
+        self._icon_queue = queue.Queue()
+        self._icons_in_flight = set()  # tk thread only
+        threading.Thread(target=self._icon_worker, daemon=True).start()
+
+        # What the current widgets show, to skip redundant rebuilds
+        self._layout_sig = None
+        self._settings_sig = None
+        self._ws_groups = {}  # workspace name -> its widgets (_build_ws_group)
+        self._separators = []
+        self._click_tags = set()  # bind tags already bound via _click_tag
+        self._update_pending = False  # an update_bar is queued on tk
 
         # Right-click context menu (disabled — kept for future use)
         self._context_menu = self._build_context_menu()
@@ -65,6 +100,7 @@ class FloatingBar:
         self._bar_hidden = self._manually_hidden
 
         # Position bar bottom-right, above taskbar
+        self._geometry = None  # last geometry string applied to the bar
         self._position_bar()
 
         # Apply Win32 flags after window is mapped
@@ -74,14 +110,11 @@ class FloatingBar:
         if self._manually_hidden:
             self.bar.after(150, self.bar.withdraw)
 
-        # Start fullscreen check loop (every 2 seconds)
+        # Re-check fullscreen on every foreground change, plus a slow poll
+        # for apps that go fullscreen without changing the foreground window
+        self._foreground_hook = hook_foreground_changes(self._on_foreground_change)
         self._check_fullscreen()
 
-    @staticmethod
-    def _rgb(color_tuple):
-        """Convert (r, g, b) to tkinter hex color."""
-        return f'#{color_tuple[0]:02x}{color_tuple[1]:02x}{color_tuple[2]:02x}'
-
     def _position_bar(self, width=300):
         """Position bar on the taskbar (right side near tray, or left side)."""
         user32 = ctypes.windll.user32
@@ -90,7 +123,7 @@ class FloatingBar:
         if not taskbar_hwnd:
             screen_w = self.root.winfo_screenwidth()
             screen_h = self.root.winfo_screenheight()
-            self.bar.geometry(f'{width}x{self.BAR_HEIGHT}+{screen_w - width - 8}+{screen_h - self.BAR_HEIGHT}')
+            self._set_geometry(f'{width}x{self.BAR_HEIGHT}+{screen_w - width - 8}+{screen_h - self.BAR_HEIGHT}')
             return
 
         taskbar_rect = wintypes.RECT()
@@ -109,7 +142,13 @@ class FloatingBar:
 
         taskbar_h = taskbar_rect.bottom - taskbar_rect.top
         y = taskbar_rect.top + (taskbar_h - self.BAR_HEIGHT) // 2
-        self.bar.geometry(f'{width}x{self.BAR_HEIGHT}+{x}+{y}')
+        self._set_geometry(f'{width}x{self.BAR_HEIGHT}+{x}+{y}')
+
+    def _set_geometry(self, geometry):
+        """Apply a geometry string unless it is already the current one."""
+        if geometry != self._geometry:
+            self.bar.geometry(geometry)
+            self._geometry = geometry
 
     def _apply_win32_flags(self):
         """Set WS_EX_NOACTIVATE | WS_EX_TOOLWINDOW on the bar window."""
@@ -125,20 +164,13 @@ class FloatingBar:
             print(f"Failed to set bar Win32 flags: {e}")
 
     def _run_cmd_async(self, cmd):
-        """Run a GlazeWM command in a background thread to avoid blocking tk."""
-        threading.Thread(target=self.app.run_cmd, args=(cmd,), daemon=True).start()
+        """Queue a GlazeWM command for the app's worker to avoid blocking tk."""
+        self.app.run_cmd_async(cmd)
 
     def _focus_workspace(self, name):
         """Focus workspace and restore any minimized windows on it."""
-        with self.app._lock:
-            processes = set()
-            for ws in self.app.all_workspaces:
-                if ws['name'] == name:
-                    for win in ws.get('windows', []):
-                        p = win.get('process', '')
-                        if p:
-                            processes.add(p.lower())
-                    break
+        ws = self.app.state.by_name.get(name)
+        processes = {win.process.lower() for win in ws.windows if win.process} if ws else set()
 
         def _do():
             self.app.run_cmd(f"focus --workspace {name}")
@@ -148,14 +180,14 @@ class FloatingBar:
             time.sleep(0.1)
             restore_minimized_by_process(processes)
 
-        threading.Thread(target=_do, daemon=True).start()
+        self.app.submit(_do)
 
     def _build_context_menu(self):
         """Build right-click context menu matching pystray menu."""
         menu = tk.Menu(self.bar, tearoff=0,
-                       bg=self._rgb(config.COLORS["bg"]),
-                       fg=self._rgb(config.COLORS["text"]),
-                       activebackground=self._rgb(config.COLORS["active"]),
+                       bg=_COLORS_HEX["bg"],
+                       fg=_COLORS_HEX["text"],
+                       activebackground=_COLORS_HEX["active"],
                        activeforeground='white')
         menu.add_command(label="Toggle Floating", command=lambda: self._run_cmd_async("toggle-floating"))
         menu.add_command(label="Toggle Tiling (Alt+V)", command=lambda: self._run_cmd_async("toggle-tiling-direction"))
@@ -172,17 +204,16 @@ class FloatingBar:
 
     def _on_exit(self):
         self.app.running = False
-        self.app._event.set()
-        for ws in [self.app._ws_sub, self.app._ws_cmd]:
-            if ws:
-                try:
-                    ws.close()
-                except:
-                    pass
+        self.app._dirty_ev.set()
+        self.app._close_sockets()
         self.root.destroy()
 
     def update_bar(self):
-        """Rebuild the bar contents from current workspace data."""
+        """Bring the bar contents in line with current workspace data.
+
+        Each workspace's widgets are kept in a group frame and only rebuilt
+        when that workspace's windows change; settings changes rebuild all.
+        """
         if self._bar_hidden:
             return
 
@@ -192,96 +223,257 @@ class FloatingBar:
         except tk.TclError:
             pass
 
-        for widget in self.frame.winfo_children():
-            widget.destroy()
-        self._photo_refs.clear()
+        state = self.app.state  # one snapshot for the whole update
+        workspaces = state.workspaces
+        errored = state.error_count > 3
+
+        # Everything but focus decides the widget layout. If only focus
+        # moved, recolor the number labels in place instead of rebuilding.
+        layout_sig = (
+            tuple((ws.name, ws.resident, ws.windows) for ws in workspaces),
+            errored,
+            self._icons_only, self._label_left, self._workspace_gap,
+            self._position_right, self._bg_hex,
+        )
+        if layout_sig == self._layout_sig:
+            for ws in workspaces:
+                bg, fg = self._num_colors(ws)
+                self._ws_groups[ws.name]['num_label'].configure(bg=bg, fg=fg)
+            return
 
-        with self.app._lock:
-            workspaces = list(self.app.all_workspaces)
+        settings_sig = layout_sig[1:]
+        if settings_sig != self._settings_sig or not workspaces or not self._ws_groups:
+            self._clear_bar()
+            self._settings_sig = settings_sig
+        self._layout_sig = layout_sig
 
         if not workspaces:
-            lbl = tk.Label(self.frame, text="?" if self.app.error_count <= 3 else "!",
-                           fg=self._rgb(config.COLORS["error"] if self.app.error_count > 3 else config.COLORS["text"]),
+            lbl = tk.Label(self.frame, text="!" if errored else "?",
+                           fg=_COLORS_HEX["error"] if errored else _COLORS_HEX["text"],
                            bg=self._widget_bg,
                            font=("Arial", 12, "bold"))
             lbl.pack(side=tk.LEFT, padx=4)
             self._position_bar(60)
             return
 
+        # Drop groups for workspaces that are gone or whose windows changed
+        current = {ws.name: ws for ws in workspaces}
+        for name, group in list(self._ws_groups.items()):
+            ws = current.get(name)
+            if ws is None or group['content'] != (ws.resident, ws.windows):
+                group['frame'].destroy()
+                del self._ws_groups[name]
+
+        # Re-pack kept and new groups in workspace order
+        for widget in self.frame.pack_slaves():
+            widget.pack_forget()
+
         total_width = self.PADDING
         for i, ws in enumerate(workspaces):
-            name = ws['name']
-            is_focused = ws['focused']
-            has_windows = ws['resident']
-            windows = ws.get('windows', [])
-
             if i > 0:
-                sep = tk.Frame(self.frame, width=1, bg=self._rgb(config.COLORS["inactive"]))
-                sep.pack(side=tk.LEFT, fill=tk.Y, padx=self._workspace_gap, pady=4)
+                if i > len(self._separators):
+                    self._separators.append(
+                        tk.Frame(self.frame, width=1, bg=_COLORS_HEX["inactive"]))
+                self._separators[i - 1].pack(side=tk.LEFT, fill=tk.Y, padx=self._workspace_gap, pady=4)
                 total_width += 1 + self._workspace_gap * 2
 
-            num_bg = self._rgb(config.COLORS["active"]) if is_focused else self._widget_bg
-            num_fg = config.COLORS["text"] if has_windows or is_focused else config.COLORS["inactive"]
-            num_label = tk.Label(self.frame, text=name, font=("Arial", 11, "bold"),
-                                 fg=self._rgb(num_fg), bg=num_bg,
-                                 padx=4, pady=0, cursor="hand2")
-            num_label.bind('<Button-1>', lambda e, n=name: self._focus_workspace(n))
-            total_width += 28
-
-            # Build icon frames first (without packing yet)
-            win_frames = []
-            for win in windows:
-                process = win.get('process', '')
-                title = win.get('title', '') or process or '?'
-
-                win_frame = tk.Frame(self.frame, bg=self._widget_bg, cursor="hand2")
-
-                icon_img = get_process_icon(process, self.ICON_SIZE)
-                if not icon_img:
-                    icon_img = make_fallback_icon(process[:1].upper() if process else '?', self.ICON_SIZE)
-                photo = ImageTk.PhotoImage(icon_img)
-                self._photo_refs.append(photo)
-                icon_lbl = tk.Label(win_frame, image=photo, bg=self._widget_bg)
-                icon_lbl.pack(side=tk.LEFT)
-
-                click_targets = [win_frame, icon_lbl]
-                if not self._icons_only:
-                    display = title if title and title != process else process
-                    for suffix in (' - Google Chrome', ' - Chrome', ' — Mozilla Firefox',
-                                   ' - Microsoft Edge', ' - Notepad', ' - Visual Studio Code'):
-                        if display.endswith(suffix):
-                            display = display[:-len(suffix)]
-                            break
-                    short_name = display[:12] if display else '?'
-                    name_lbl = tk.Label(win_frame, text=short_name, font=("Arial", 7),
-                                        fg=self._rgb(config.COLORS["text"]),
-                                        bg=self._widget_bg)
-                    name_lbl.pack(side=tk.LEFT, padx=(1, 0))
-                    total_width += self.ICON_SIZE + len(short_name) * 5 + 6
-                    click_targets.append(name_lbl)
-                else:
-                    total_width += self.ICON_SIZE + 4
-
-                for w in click_targets:
-                    w.bind('<Button-1>', lambda e, n=name: self._focus_workspace(n))
-                win_frames.append(win_frame)
-
-            # Pack number label and icon frames in configured order
-            if self._label_left:
-                num_label.pack(side=tk.LEFT, padx=(2, 1))
-                for wf in win_frames:
-                    wf.pack(side=tk.LEFT, padx=(2, 0))
+            group = self._ws_groups.get(ws.name)
+            if group is None:
+                group = self._ws_groups[ws.name] = self._build_ws_group(ws)
             else:
-                for wf in win_frames:
-                    wf.pack(side=tk.LEFT, padx=(2, 0))
-                num_label.pack(side=tk.LEFT, padx=(1, 2))
+                bg, fg = self._num_colors(ws)
+                group['num_label'].configure(bg=bg, fg=fg)
+            group['frame'].pack(side=tk.LEFT)
+            total_width += group['width']
+
+        for sep in self._separators[len(workspaces) - 1:]:
+            sep.destroy()
+        del self._separators[len(workspaces) - 1:]
 
         total_width += self.PADDING
         total_width = max(total_width, 60)
         self._position_bar(total_width)
 
+        if len(self._photo_cache) > self._PHOTO_CACHE_SIZE:
+            self._prune_photos(workspaces)
+
+    def _prune_photos(self, workspaces):
+        """Drop Tk images for processes no longer shown on any workspace."""
+        shown = {win.process for ws in workspaces for win in ws.windows}
+        for key in [k for k in self._photo_cache if k[0] not in shown]:
+            del self._photo_cache[key]
+
+    def _clear_bar(self):
+        """Destroy every widget in the bar."""
+        for widget in self.frame.winfo_children():
+            widget.destroy()
+        self._ws_groups.clear()
+        self._separators.clear()
+
+    def _click_tag(self, name):
+        """Bind tag whose <Button-1> focuses workspace `name`.
+
+        Bound once per name; widgets opt in through their bindtags, so a
+        rebuild adds no new bindings or callbacks.
+        """
+        tag = f"ws:{name}"
+        if tag not in self._click_tags:
+            self.bar.bind_class(tag, '<Button-1>', lambda e: self._focus_workspace(name))
+            self._click_tags.add(tag)
+        return tag
+
+    def _build_ws_group(self, ws):
+        """Create one workspace's number label and window icons in a frame."""
+        name = ws.name
+        click_tag = self._click_tag(name)
+        group_frame = tk.Frame(self.frame, bg=self._bg_hex)
+
+        num_bg, num_fg = self._num_colors(ws)
+        num_label = tk.Label(group_frame, text=name, font=("Arial", 11, "bold"),
+                             fg=num_fg, bg=num_bg,
+                             padx=4, pady=0, cursor="hand2")
+        num_label.bindtags((click_tag,) + num_label.bindtags())
+        width = 28
+
+        # Build icon frames first (without packing yet)
+        win_frames = []
+        for win in ws.windows:
+            process = win.process
+            title = win.title or process or '?'
+
+            win_frame = tk.Frame(group_frame, bg=self._widget_bg, cursor="hand2")
+
+            photo = self._photo_for(process)
+            icon_lbl = tk.Label(win_frame, image=photo, bg=self._widget_bg)
+            icon_lbl.pack(side=tk.LEFT)
+
+            click_targets = [win_frame, icon_lbl]
+            if not self._icons_only:
+                display = title if title and title != process else process
+                if display:
+                    display = _TITLE_SUFFIX_RE.sub('', display, count=1)
+                short_name = display[:12] if display else '?'
+                name_lbl = tk.Label(win_frame, text=short_name, font=("Arial", 7),
+                                    fg=_COLORS_HEX["text"],
+                                    bg=self._widget_bg)
+                name_lbl.pack(side=tk.LEFT, padx=(1, 0))
+                width += self.ICON_SIZE + len(short_name) * 5 + 6
+                click_targets.append(name_lbl)
+            else:
+                width += self.ICON_SIZE + 4
+
+            for w in click_targets:
+                w.bindtags((click_tag,) + w.bindtags())
+            win_frames.append(win_frame)
+
+        # Pack number label and icon frames in configured order
+        if self._label_left:
+            num_label.pack(side=tk.LEFT, padx=(2, 1))
+            for wf in win_frames:
+                wf.pack(side=tk.LEFT, padx=(2, 0))
+        else:
+            for wf in win_frames:
+                wf.pack(side=tk.LEFT, padx=(2, 0))
+            num_label.pack(side=tk.LEFT, padx=(1, 2))
+
+        return {
+            'frame': group_frame,
+            'num_label': num_label,
+            'content': (ws.resident, ws.windows),
+            'width': width,
+        }
+
+    def _icon_worker(self):
+        """Extract queued process icons off the tk thread."""
+        while True:
+            processes = [self._icon_queue.get()]
+            while True:  # take the whole burst, to share one process snapshot
+                try:
+                    processes.append(self._icon_queue.get_nowait())
+                except queue.Empty:
+                    break
+            pid_map = {}
+            for process in processes:
+                get_process_icon(process, self.ICON_SIZE, pid_map)
+            try:
+                self.root.after_idle(self._on_icons_loaded, processes)
+            except (tk.TclError, RuntimeError):
+                return  # tk is gone
+
+    def _on_icons_loaded(self, processes):
+        """Rebuild the workspace groups that can now show real icons.
+
+        Failed extractions (often a process still starting up) are queued
+        again after a short delay, until get_process_icon gives up on them.
+        """
+        loaded = {p for p in processes if cached_process_icon(p)}
+        retry = [p for p in processes if p not in loaded and can_extract_icon(p)]
+        # Retried processes stay in flight so _photo_for doesn't queue them twice
+        self._icons_in_flight.difference_update(set(processes).difference(retry))
+        if retry:
+            self.root.after(self._ICON_RETRY_MS, self._requeue_icons, retry)
+        if not loaded:
+            return
+        for name, group in list(self._ws_groups.items()):
+            if any(win.process in loaded for win in group['content'][1]):
+                group['frame'].destroy()
+                del self._ws_groups[name]
+        self._layout_sig = None
+        self.update_bar()
+
+    def _requeue_icons(self, processes):
+        for process in processes:
+            self._icon_queue.put(process)
+
+    def _num_colors(self, ws):
+        """(bg, fg) of a workspace's number label."""
+        num_bg = _COLORS_HEX["active"] if ws.focused else self._widget_bg
+        num_fg = _COLORS_HEX["text"] if ws.resident or ws.focused else _COLORS_HEX["inactive"]
+        return num_bg, num_fg
+
+    def _photo_for(self, process):
+        """Return the cached Tk image for a process's icon (or fallback).
+
+        Icons not extracted yet are queued for the icon worker and shown
+        as the fallback until they arrive.
+        """
+        key = (process, self.ICON_SIZE)
+        cached = self._photo_cache.get(key)  # (PhotoImage, is real icon)
+        # A real icon's Tk image is kept even if icons.py has since evicted
+        # its source: kept groups still display it.
+        if cached is not None and cached[1]:
+            return cached[0]
+        icon_img = cached_process_icon(process)
+        if icon_img is None:
+            if process and process not in self._icons_in_flight and can_extract_icon(process):
+                self._icons_in_flight.add(process)
+                self._icon_queue.put(process)
+            if cached is not None:
+                return cached[0]
+            icon_img = make_fallback_icon(process[:1].upper() if process else '?', self.ICON_SIZE)
+            is_real = False
+        else:
+            is_real = True  # replaces the fallback, once
+        photo = ImageTk.PhotoImage(icon_img)
+        self._photo_cache[key] = (photo, is_real)
+        return photo
+
     def _check_fullscreen(self):
-        """Periodically check if a fullscreen app is active and hide/show bar."""
+        """Safety poll behind the foreground hook."""
+        self._reevaluate_fullscreen()
+        # Without the hook, fall back to the old 1 s poll
+        delay = self._FULLSCREEN_POLL_MS if self._foreground_hook else 1000
+        self.root.after(delay, self._check_fullscreen)
+
+    def _on_foreground_change(self):
+        # Called from inside a ctypes callback: never let an exception out
+        try:
+            self.root.after_idle(self._reevaluate_fullscreen)
+        except (tk.TclError, RuntimeError):
+            pass  # tk is shutting down
+
+    def _reevaluate_fullscreen(self):
+        """Hide the bar while a fullscreen app is active, show it otherwise."""
         try:
             if self._manually_hidden:
                 pass
@@ -297,30 +489,29 @@ class FloatingBar:
                     self.update_bar()
         except Exception:
             pass
-        self.root.after(1000, self._check_fullscreen)
 
     def toggle_icons_only(self):
         """Switch between icons+text and icons-only mode."""
         self._icons_only = not self._icons_only
-        self.update_bar()
+        self.schedule_update()
         self.app._save_settings()
 
     def toggle_position(self):
         """Switch between right side (near tray) and left side of taskbar."""
         self._position_right = not self._position_right
-        self.update_bar()
+        self.schedule_update()
         self.app._save_settings()
 
     def toggle_label_side(self):
         """Switch workspace number between left and right of its icons."""
         self._label_left = not self._label_left
-        self.update_bar()
+        self.schedule_update()
         self.app._save_settings()
 
     def toggle_workspace_gap(self):
         """Switch between compact (3px) and wide (12px) spacing between workspaces."""
         self._workspace_gap = 12 if self._workspace_gap <= 3 else 3
-        self.update_bar()
+        self.schedule_update()
         self.app._save_settings()
 
     def toggle_background(self):
@@ -335,17 +526,34 @@ class FloatingBar:
             self.bar.configure(bg=self._bg_hex)
             self.bar.attributes('-transparentcolor', '')
         self.frame.configure(bg=self._bg_hex)
-        self.update_bar()
+        self.schedule_update()
         self.app._save_settings()
 
     def schedule_update(self):
-        """Thread-safe: schedule a bar update on the tk mainloop."""
+        """Thread-safe: schedule a bar update on the tk mainloop.
+
+        Calls made while an update is already queued are folded into it.
+        """
+        if self._update_pending:
+            return
+        self._update_pending = True
         try:
-            self.root.after_idle(self.update_bar)
-        except tk.TclError:
-            pass
+            self.root.after_idle(self._run_scheduled_update)
+        except (tk.TclError, RuntimeError):  # tk not running (yet, or any more)
+            self._update_pending = False
+
+    def _run_scheduled_update(self):
+        # Cleared first: changes arriving during the update queue another
+        self._update_pending = False
+        self.update_bar()
 
     def run(self):
         """Start the tkinter mainloop."""
         self.update_bar()
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            # Same thread that installed it, as UnhookWinEvent requires
+            if self._foreground_hook:
+                unhook_foreground_changes(self._foreground_hook)
+                self._foreground_hook = None
@@ -1,165 +1,300 @@
 """Win32 icon extraction and fallback icon generation."""
 
+import os
+import atexit
 import ctypes
+import hashlib
+import threading
+from collections import OrderedDict
 from ctypes import wintypes
 from PIL import Image, ImageDraw, ImageFont
 
 from .win32 import (
-    PROCESSENTRY32W, SHFILEINFOW, BITMAPINFOHEADER,
-    TH32CS_SNAPPROCESS, MAX_PATH, DI_NORMAL,
-    SHGFI_ICON, SHGFI_LARGEICON,
+    SHFILEINFOW, BITMAPINFOHEADER,
+    MAX_PATH, DI_NORMAL,
+    SHGFI_ICON, SHGFI_SMALLICON, SHGFI_LARGEICON,
     PROCESS_QUERY_LIMITED_INFORMATION,
+    snapshot_processes,
 )
 
+_LOCALAPPDATA = os.environ.get('LOCALAPPDATA')
+# Extracted icons persist here as PNGs so warm starts skip GDI extraction
+_DISK_CACHE_DIR = os.path.join(_LOCALAPPDATA, 'glazewm-tray', 'icons') if _LOCALAPPDATA else None
 
-def _get_exe_path_for_process(process_name):
-    """Find the full exe path for a process by name using toolhelp snapshots (Unicode)."""
+
+def _get_exe_path_for_process(process_name, pid_map):
+    """Find the full exe path for a process by name (Unicode).
+
+    pid_map is a snapshot_processes() result; an empty dict is filled in
+    place, so callers can share one snapshot across several lookups.
+    """
     target = process_name.lower()
     if not target.endswith('.exe'):
         target += '.exe'
 
-    kernel32 = ctypes.windll.kernel32
-    snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
-    if snapshot == -1:
-        return None
+    if not pid_map:
+        pid_map.update(snapshot_processes())
 
-    try:
-        entry = PROCESSENTRY32W()
-        entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
-
-        if not kernel32.Process32FirstW(snapshot, ctypes.byref(entry)):
-            return None
-
-        while True:
-            if entry.szExeFile.lower() == target:
-                pid = entry.th32ProcessID
-                handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
-                if handle:
-                    try:
-                        buf = ctypes.create_unicode_buffer(MAX_PATH)
-                        size = wintypes.DWORD(MAX_PATH)
-                        if kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
-                            return buf.value
-                    finally:
-                        kernel32.CloseHandle(handle)
-            if not kernel32.Process32NextW(snapshot, ctypes.byref(entry)):
-                break
-    finally:
-        kernel32.CloseHandle(snapshot)
+    kernel32 = ctypes.windll.kernel32
+    for pid in pid_map.get(target, ()):
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if handle:
+            try:
+                buf = ctypes.create_unicode_buffer(MAX_PATH)
+                size = wintypes.DWORD(MAX_PATH)
+                if kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
+                    return buf.value
+            finally:
+                kernel32.CloseHandle(handle)
     return None
 
 
-def _hicon_to_pil(hicon, out_size=16):
-    """Convert HICON to PIL Image using DrawIconEx into a DIB section."""
-    user32 = ctypes.windll.user32
-    gdi32 = ctypes.windll.gdi32
-
-    render_size = 32
-
-    hdc_screen = user32.GetDC(0)
-    hdc = gdi32.CreateCompatibleDC(hdc_screen)
-
-    bmi = BITMAPINFOHEADER()
-    bmi.biSize = ctypes.sizeof(BITMAPINFOHEADER)
-    bmi.biWidth = render_size
-    bmi.biHeight = -render_size  # top-down
-    bmi.biPlanes = 1
-    bmi.biBitCount = 32
-    bmi.biCompression = 0
-
-    bits = ctypes.c_void_p()
-    hbm = gdi32.CreateDIBSection(hdc, ctypes.byref(bmi), 0, ctypes.byref(bits), None, 0)
-    if not hbm:
-        gdi32.DeleteDC(hdc)
-        user32.ReleaseDC(0, hdc_screen)
-        return None
+class _IconRenderer:
+    """A memory DC with a 32bpp top-down DIB section selected into it.
 
-    old_bm = gdi32.SelectObject(hdc, hbm)
+    Kept alive between conversions so each icon costs one DrawIconEx plus
+    a copy, instead of creating and deleting the DC and bitmap every time.
+    """
 
-    user32.DrawIconEx(hdc, 0, 0, hicon, render_size, render_size, 0, 0, DI_NORMAL)
+    def __init__(self, size):
+        user32 = ctypes.windll.user32
+        gdi32 = ctypes.windll.gdi32
+        self.size = size
+        self.nbytes = size * size * 4
 
-    buf_size = render_size * render_size * 4
-    buf = (ctypes.c_byte * buf_size)()
-    ctypes.memmove(buf, bits, buf_size)
+        hdc_screen = user32.GetDC(0)
+        self.hdc = gdi32.CreateCompatibleDC(hdc_screen)
+        user32.ReleaseDC(0, hdc_screen)
 
-    gdi32.SelectObject(hdc, old_bm)
-    gdi32.DeleteObject(hbm)
-    gdi32.DeleteDC(hdc)
-    user32.ReleaseDC(0, hdc_screen)
+        bmi = BITMAPINFOHEADER()
+        bmi.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+        bmi.biWidth = size
+        bmi.biHeight = -size  # top-down
+        bmi.biPlanes = 1
+        bmi.biBitCount = 32
+        bmi.biCompression = 0
+
+        self.bits = ctypes.c_void_p()
+        self.hbm = gdi32.CreateDIBSection(self.hdc, ctypes.byref(bmi), 0,
+                                          ctypes.byref(self.bits), None, 0)
+        if not self.hbm:
+            gdi32.DeleteDC(self.hdc)
+            raise OSError("CreateDIBSection failed")
+        self.old_bm = gdi32.SelectObject(self.hdc, self.hbm)
+        # Buffer view straight onto the DIB's pixel memory
+        self.pixels = (ctypes.c_char * self.nbytes).from_address(self.bits.value)
+
+    def render(self, hicon):
+        """Draw hicon onto a cleared bitmap and return it as an RGBA image."""
+        ctypes.memset(self.bits, 0, self.nbytes)  # DrawIconEx blends
+        ctypes.windll.user32.DrawIconEx(self.hdc, 0, 0, hicon, self.size, self.size,
+                                        0, 0, DI_NORMAL)
+        ctypes.windll.gdi32.GdiFlush()  # finish drawing before reading bits
+        # PIL's raw decoder reads the DIB in place and swaps BGRA -> RGBA
+        # in C while copying into the image's own memory.
+        return Image.frombytes('RGBA', (self.size, self.size), self.pixels, 'raw', 'BGRA')
+
+    def close(self):
+        gdi32 = ctypes.windll.gdi32
+        gdi32.SelectObject(self.hdc, self.old_bm)
+        gdi32.DeleteObject(self.hbm)
+        gdi32.DeleteDC(self.hdc)
+
+
+_renderers = {}  # size -> _IconRenderer
+_render_lock = threading.Lock()
+
+
+@atexit.register
+def _close_renderers():
+    with _render_lock:
+        for renderer in _renderers.values():
+            renderer.close()
+        _renderers.clear()
 
-    # BGRA -> RGBA
-    raw = bytearray(buf)
-    for i in range(0, len(raw), 4):
-        raw[i], raw[i + 2] = raw[i + 2], raw[i]
 
-    img = Image.frombytes('RGBA', (render_size, render_size), bytes(raw))
+def _hicon_to_pil(hicon, out_size=16):
+    """Convert HICON to PIL Image using DrawIconEx into a DIB section.
+
+    The icon is drawn straight at out_size, so no resampling is needed.
+    """
+    with _render_lock:
+        renderer = _renderers.get(out_size)
+        if renderer is None:
+            try:
+                renderer = _renderers[out_size] = _IconRenderer(out_size)
+            except OSError:
+                return None
+        img = renderer.render(hicon)
 
     if img.getextrema()[3][1] == 0:  # alpha channel max is 0
         return None
-
-    if render_size != out_size:
-        img = img.resize((out_size, out_size), Image.LANCZOS)
     return img
 
 
-def _get_icon_via_shgetfileinfo(exe_path):
+def _get_icon_via_shgetfileinfo(exe_path, small=False):
     """Get HICON using SHGetFileInfoW — reliable for most exe files."""
     info = SHFILEINFOW()
     result = ctypes.windll.shell32.SHGetFileInfoW(
         exe_path, 0, ctypes.byref(info), ctypes.sizeof(SHFILEINFOW),
-        SHGFI_ICON | SHGFI_LARGEICON
+        SHGFI_ICON | (SHGFI_SMALLICON if small else SHGFI_LARGEICON)
     )
     if result and info.hIcon:
         return info.hIcon
     return None
 
 
-def get_process_icon(process_name, size=16, _cache={}, _failures={}):
-    """Get an app icon as a PIL Image for a given process name.
-    Uses SHGetFileInfoW (most reliable) with ExtractIconExW as fallback.
-    Retries up to 3 times for processes not yet ready."""
-    if process_name in _cache:
-        return _cache[process_name]
+def _extract_icon(exe_path, size):
+    """Extract an exe's icon at `size` px via the shell, or None."""
+    icon_img = None
+    # Ask for the embedded image closest to the target size (16px art for
+    # small icons) so DrawIconEx doesn't have to scale much.
+    small = size <= 16
+
+    # Method 1: SHGetFileInfoW (most reliable)
+    hicon = _get_icon_via_shgetfileinfo(exe_path, small)
+    if hicon:
+        try:
+            icon_img = _hicon_to_pil(hicon, size)
+        finally:
+            ctypes.windll.user32.DestroyIcon(hicon)
+
+    # Method 2: ExtractIconExW (fallback)
+    if not icon_img:
+        hicon_out = wintypes.HICON()
+        if small:
+            result = ctypes.windll.shell32.ExtractIconExW(
+                exe_path, 0, None, ctypes.byref(hicon_out), 1
+            )
+        else:
+            result = ctypes.windll.shell32.ExtractIconExW(
+                exe_path, 0, ctypes.byref(hicon_out), None, 1
+            )
+        if result > 0 and hicon_out.value:
+            try:
+                icon_img = _hicon_to_pil(hicon_out.value, size)
+            finally:
+                ctypes.windll.user32.DestroyIcon(hicon_out.value)
+    return icon_img
+
+
+def _disk_cache_path(exe_path, size):
+    digest = hashlib.sha1(f"{exe_path.lower()}|{size}".encode('utf-8')).hexdigest()
+    return os.path.join(_DISK_CACHE_DIR, digest + '.png')
+
+
+def _load_cached_icon(exe_path, size):
+    """Load a previously extracted icon, unless the exe changed since."""
+    if not _DISK_CACHE_DIR:
+        return None
+    path = _disk_cache_path(exe_path, size)
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(exe_path):
+            return None  # exe updated after caching — its icon may differ
+        with Image.open(path) as img:
+            return img.convert('RGBA')
+    except OSError:
+        return None
+
+
+def _store_cached_icon(exe_path, size, img):
+    if not _DISK_CACHE_DIR:
+        return
+    path = _disk_cache_path(exe_path, size)
+    tmp = path + '.tmp'
+    try:
+        os.makedirs(_DISK_CACHE_DIR, exist_ok=True)
+        img.save(tmp, 'PNG')
+        os.replace(tmp, path)  # readers never see a half-written file
+    except OSError as e:
+        print(f"Icon cache write failed: {e}")
+
+
+_icon_cache = OrderedDict()     # process name -> extracted icon (LRU eviction)
+_icon_failures = OrderedDict()  # process name -> failed extraction attempts
+_MAX_ATTEMPTS = 3
+_ICON_CACHE_SIZE = 256  # icons evicted past this reload from the disk cache
+_FAILURE_CACHE_SIZE = 256  # oldest failure records dropped past this
+
+
+def _touch(process_name):
+    """Mark a cached icon as recently used (it may be evicted concurrently)."""
+    try:
+        _icon_cache.move_to_end(process_name)
+    except KeyError:
+        pass
 
-    if _failures.get(process_name, 0) >= 3:
+
+def cached_process_icon(process_name):
+    """Return the icon already extracted for a process, or None (no extraction)."""
+    icon_img = _icon_cache.get(process_name)
+    if icon_img is not None:
+        _touch(process_name)
+    return icon_img
+
+
+def can_extract_icon(process_name):
+    """True if get_process_icon would still try to extract this process's icon."""
+    return (process_name not in _icon_cache
+            and _icon_failures.get(process_name, 0) < _MAX_ATTEMPTS)
+
+
+def get_process_icon(process_name, size=16, pid_map=None):
+    """Get an app icon as a PIL Image for a given process name.
+    Uses SHGetFileInfoW (most reliable) with ExtractIconExW as fallback;
+    results are also kept on disk, keyed by exe path and checked against
+    the exe's mtime.
+    Retries up to 3 times for processes not yet ready.
+    Pass the same (initially empty) pid_map dict for a batch of lookups to
+    take only one process snapshot for all of them."""
+    icon_img = _icon_cache.get(process_name)
+    if icon_img is not None:
+        _touch(process_name)
+        return icon_img
+
+    if _icon_failures.get(process_name, 0) >= _MAX_ATTEMPTS:
         return None
 
     icon_img = None
     try:
-        exe_path = _get_exe_path_for_process(process_name)
+        exe_path = _get_exe_path_for_process(process_name, {} if pid_map is None else pid_map)
         if exe_path:
-            # Method 1: SHGetFileInfoW (most reliable)
-            hicon = _get_icon_via_shgetfileinfo(exe_path)
-            if hicon:
-                try:
-                    icon_img = _hicon_to_pil(hicon, size)
-                finally:
-                    ctypes.windll.user32.DestroyIcon(hicon)
-
-            # Method 2: ExtractIconExW (fallback - gets large icon)
+            icon_img = _load_cached_icon(exe_path, size)
             if not icon_img:
-                hicon_large = wintypes.HICON()
-                result = ctypes.windll.shell32.ExtractIconExW(
-                    exe_path, 0, ctypes.byref(hicon_large), None, 1
-                )
-                if result > 0 and hicon_large.value:
-                    try:
-                        icon_img = _hicon_to_pil(hicon_large.value, size)
-                    finally:
-                        ctypes.windll.user32.DestroyIcon(hicon_large.value)
+                icon_img = _extract_icon(exe_path, size)
+                if icon_img:
+                    _store_cached_icon(exe_path, size, icon_img)
     except Exception as e:
         print(f"Icon extraction failed for {process_name}: {e}")
 
     if icon_img:
-        _cache[process_name] = icon_img
+        _icon_cache[process_name] = icon_img
+        if len(_icon_cache) > _ICON_CACHE_SIZE:
+            _icon_cache.popitem(last=False)
     else:
-        _failures[process_name] = _failures.get(process_name, 0) + 1
-        if _failures[process_name] == 1:
+        attempts = _icon_failures.pop(process_name, 0) + 1
+        _icon_failures[process_name] = attempts  # re-inserted as newest
+        if len(_icon_failures) > _FAILURE_CACHE_SIZE:
+            _icon_failures.popitem(last=False)
+        if attempts == 1:
             print(f"Icon not found for: {process_name}")
     return icon_img
 
 
 _fallback_cache = {}
+_fallback_fonts = {}
+
+
+def _fallback_font(size):
+    """Letter font for fallback icons, loaded once per size."""
+    font = _fallback_fonts.get(size)
+    if font is None:
+        try:
+            font = ImageFont.truetype("arial.ttf", size - 6)
+        except Exception:
+            font = ImageFont.load_default()
+        _fallback_fonts[size] = font
+    return font
 
 
 def make_fallback_icon(letter, size=16):
@@ -170,10 +305,7 @@ def make_fallback_icon(letter, size=16):
     img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
     d = ImageDraw.Draw(img)
     d.ellipse([1, 1, size - 2, size - 2], fill=(80, 80, 80, 200))
-    try:
-        font = ImageFont.truetype("arial.ttf", size - 6)
-    except Exception:
-        font = ImageFont.load_default()
+    font = _fallback_font(size)
     bbox = d.textbbox((0, 0), letter, font=font)
     tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
     d.text(((size - tw) / 2, (size - th) / 2 - 1), letter, fill=(255, 255, 255), font=font)
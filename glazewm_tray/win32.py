@@ -1,6 +1,5 @@
 """Win32 constants, structures, and helper functions."""
 
-import os
 import ctypes
 from ctypes import wintypes
 
@@ -17,6 +16,13 @@ DI_NORMAL = 0x0003
 SHGFI_ICON = 0x000000100
 SHGFI_SMALLICON = 0x000000001
 SHGFI_LARGEICON = 0x000000000
+EVENT_SYSTEM_FOREGROUND = 0x0003
+WINEVENT_OUTOFCONTEXT = 0x0000
+
+# Desktop and taskbar window classes: they cover a monitor but aren't fullscreen apps
+_NON_FULLSCREEN_CLASSES = frozenset({
+    "Progman", "WorkerW", "Shell_TrayWnd", "Shell_SecondaryTrayWnd",
+})
 
 
 # --- Win32 structures ---
@@ -73,30 +79,79 @@ class MONITORINFO(ctypes.Structure):
 
 # --- Helper functions ---
 
+def snapshot_processes():
+    """Map lowercase exe name -> list of PIDs, from one toolhelp snapshot."""
+    kernel32 = ctypes.windll.kernel32
+    pids = {}
+    snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+    if snapshot == -1:
+        return pids
+    try:
+        entry = PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+        if kernel32.Process32FirstW(snapshot, ctypes.byref(entry)):
+            while True:
+                pids.setdefault(entry.szExeFile.lower(), []).append(entry.th32ProcessID)
+                if not kernel32.Process32NextW(snapshot, ctypes.byref(entry)):
+                    break
+    finally:
+        kernel32.CloseHandle(snapshot)
+    return pids
+
+
 def make_process_windows_unfocusable():
-    """Set WS_EX_NOACTIVATE | WS_EX_TOOLWINDOW on all windows belonging to
-    this process, preventing the pystray hidden window from ever stealing
-    focus when another window closes (which confuses GlazeWM)."""
-    pid = os.getpid()
+    """Set WS_EX_NOACTIVATE on all windows owned by the calling thread,
+    preventing the pystray hidden window from ever stealing focus when
+    another window closes (which confuses GlazeWM).
+
+    Call it from the main thread: pystray and tkinter both create their
+    windows there.
+    """
+    user32 = ctypes.windll.user32
     found = []
 
+    # Walk only this thread's windows rather than every top-level window
+    # on the desktop — no per-window owner-PID lookup needed.
     @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
     def enum_callback(hwnd, _lparam):
-        proc_id = wintypes.DWORD()
-        ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(proc_id))
-        if proc_id.value == pid:
-            style = ctypes.windll.user32.GetWindowLongW(hwnd, GWL_EXSTYLE)
-            new_style = style | WS_EX_NOACTIVATE
-            if new_style != style:
-                ctypes.windll.user32.SetWindowLongW(hwnd, GWL_EXSTYLE, new_style)
-                found.append(hwnd)
+        style = user32.GetWindowLongW(hwnd, GWL_EXSTYLE)
+        new_style = style | WS_EX_NOACTIVATE
+        if new_style != style:
+            user32.SetWindowLongW(hwnd, GWL_EXSTYLE, new_style)
+            found.append(hwnd)
         return True
 
-    ctypes.windll.user32.EnumWindows(enum_callback, 0)
+    user32.EnumThreadWindows(ctypes.windll.kernel32.GetCurrentThreadId(), enum_callback, 0)
     if found:
         print(f"Set WS_EX_NOACTIVATE on {len(found)} process window(s)")
 
 
+def hook_foreground_changes(callback):
+    """Call callback() whenever the foreground window changes.
+
+    The hook is out-of-context, so callback runs on the calling thread's
+    message loop. Returns a (hook handle, ctypes callback) pair, or None on
+    failure; keep it referenced while the hook lives and pass it to
+    unhook_foreground_changes from the same thread to remove it.
+    """
+    @ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                        wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+    def win_event_proc(_hook, _event, _hwnd, _obj, _child, _thread, _time):
+        callback()
+
+    user32 = ctypes.windll.user32
+    user32.SetWinEventHook.restype = wintypes.HANDLE  # don't truncate to int
+    hook = user32.SetWinEventHook(
+        EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND, 0,
+        win_event_proc, 0, 0, WINEVENT_OUTOFCONTEXT)
+    return (hook, win_event_proc) if hook else None
+
+
+def unhook_foreground_changes(hook):
+    """Remove a hook installed by hook_foreground_changes."""
+    ctypes.windll.user32.UnhookWinEvent(wintypes.HANDLE(hook[0]))
+
+
 def is_fullscreen_active():
     """Check if the foreground window is fullscreen (covers entire monitor).
 
@@ -113,8 +168,7 @@ def is_fullscreen_active():
     # the desktop the foreground window and would otherwise hide the bar.
     class_buf = ctypes.create_unicode_buffer(256)
     user32.GetClassNameW(hwnd, class_buf, 256)
-    if class_buf.value in ("Progman", "WorkerW", "Shell_TrayWnd",
-                           "Shell_SecondaryTrayWnd"):
+    if class_buf.value in _NON_FULLSCREEN_CLASSES:
         return False
 
     rect = wintypes.RECT()
@@ -137,24 +191,11 @@ def restore_minimized_by_process(process_names):
     """Find minimized windows belonging to given process names and restore them.
     process_names should be a set of lowercase process name strings."""
     user32 = ctypes.windll.user32
-    kernel32 = ctypes.windll.kernel32
 
     target_pids = set()
-    snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
-    if snapshot == -1:
-        return
-    try:
-        entry = PROCESSENTRY32W()
-        entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
-        if kernel32.Process32FirstW(snapshot, ctypes.byref(entry)):
-            while True:
-                exe = entry.szExeFile.lower()
-                if exe in process_names or exe.replace('.exe', '') in process_names:
-                    target_pids.add(entry.th32ProcessID)
-                if not kernel32.Process32NextW(snapshot, ctypes.byref(entry)):
-                    break
-    finally:
-        kernel32.CloseHandle(snapshot)
+    for exe, pids in snapshot_processes().items():
+        if exe in process_names or exe.replace('.exe', '') in process_names:
+            target_pids.update(pids)
 
     if not target_pids:
         return
@@ -0,0 +1,23 @@
+import unittest
+
+try:
+    from glazewm_tray.app import _workspace_sort_key
+except ImportError:  # needs the app's runtime deps (Pillow, pystray, websocket-client)
+    _workspace_sort_key = None
+
+
+@unittest.skipIf(_workspace_sort_key is None, "app dependencies not installed")
+class WorkspaceSortKeyTest(unittest.TestCase):
+    def test_numeric_names_sort_naturally(self):
+        names = ["10", "web", "2", "1"]
+        self.assertEqual(sorted(names, key=_workspace_sort_key), ["1", "2", "10", "web"])
+
+    def test_non_decimal_digits_sort_as_text(self):
+        # str.isdigit() accepts these but int() rejects them
+        for name in ("²", "②"):
+            self.assertEqual(_workspace_sort_key(name), (1 << 31, name))
+        self.assertEqual(sorted(["²", "3"], key=_workspace_sort_key), ["3", "²"])
+
+
+if __name__ == "__main__":
+    unittest.main()